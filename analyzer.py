@@ -1,3 +1,7 @@
+import functools
+
+from parser import NodeType
+
 class Symbol:
     def __init__(self, name, type_name, scope_level):
         self.name = name
@@ -9,211 +13,289 @@ class Symbol:
     def __repr__(self):
         return f"Symbol({self.name}, {self.type}, level={self.scope_level}, init={self.initialized}, used={self.used})"
 
-class Scope:
-    def __init__(self, parent=None, level=0):
-        self.symbols = {}
-        self.parent = parent
-        self.level = level
-    
-    def define(self, name, type_name):
-        symbol = Symbol(name, type_name, self.level)
-        self.symbols[name] = symbol
-        return symbol
-    
-    def resolve(self, name):
-        if name in self.symbols:
-            return self.symbols[name]
-        elif self.parent:
-            return self.parent.resolve(name)
+_STRING_QUOTES = ('"', "'")
+
+def _is_unquoted(literal_value):
+    return literal_value[:1] not in _STRING_QUOTES
+
+def _is_char_literal(literal_value):
+    return literal_value[:1] == "'" and len(literal_value) == 3
+
+# Declared type -> test that a literal is compatible with it
+_LITERAL_CHECKS = {
+    "int": _is_unquoted,
+    "float": _is_unquoted,
+    "double": _is_unquoted,
+    "char": _is_char_literal,
+}
+
+# Programs repeat the same (type, literal) pairs, so remember the verdicts
+@functools.lru_cache(maxsize=4096)
+def _literal_fits(decl_type, literal_value):
+    check = _LITERAL_CHECKS.get(decl_type)
+    return check is None or check(literal_value)
+
+# Returns an error message if the literal doesn't fit the declared type
+def _check_literal_compat(decl_type, literal_value, var_name, assignment=False):
+    if _literal_fits(decl_type, literal_value):
         return None
+    if decl_type == "char":
+        return f"Invalid character literal for variable '{var_name}'"
+    if assignment:
+        return f"Cannot assign string literal to {decl_type} variable '{var_name}'"
+    return f"Cannot initialize {decl_type} variable '{var_name}' with string literal"
+
+# Looked up for every operand, and enum class attribute lookups are slow
+_IDENTIFIER = NodeType.IDENTIFIER
+_LITERAL = NodeType.LITERAL
+
+# Node types the analyzer has checks for
+_INTERESTING = frozenset((
+    NodeType.PROGRAM, NodeType.BLOCK, NodeType.VARIABLE_DECLARATION,
+    NodeType.ASSIGNMENT, NodeType.IDENTIFIER, NodeType.BINARY_OP,
+    NodeType.UNARY_OP, NodeType.FOR_LOOP, NodeType.WHILE_LOOP,
+    NodeType.DO_WHILE_LOOP, NodeType.IF_STATEMENT, NodeType.RETURN_STATEMENT,
+))
+
+# Plus the containers that can hold them; anything else (literals, errors,
+# empty statements, breaks) is a dead end and never gets visited
+_MAY_CONTAIN_INTERESTING = _INTERESTING | {
+    NodeType.POSTFIX_OP, NodeType.SWITCH_STATEMENT,
+    NodeType.CASE_STATEMENT, NodeType.DEFAULT_STATEMENT,
+}
 
 class SemanticAnalyzer:
+    # Stop analyzing once this many errors have been reported
+    _MAX_ERRORS = 200
+    
     def __init__(self, ast):
         self.ast = ast
-        self.current_scope = Scope()
+        # Innermost scope last; each scope maps names to symbols
+        self.scope_stack = [{}]
         self.errors = []
+        self._aborted = False
+        # Identifier node -> symbol it resolved to, so operand checks don't resolve twice
+        self._resolved = {}
+        
+        # Node type -> handler, looked up once per visited node
+        self._handlers = {
+            NodeType.PROGRAM: self._visit_children,
+            NodeType.BLOCK: self._visit_block,
+            NodeType.VARIABLE_DECLARATION: self._visit_variable_declaration,
+            NodeType.IDENTIFIER: self._visit_identifier,
+            NodeType.ASSIGNMENT: self._visit_assignment,
+            NodeType.BINARY_OP: self._visit_binary_op,
+            NodeType.UNARY_OP: self._visit_unary_op,
+            NodeType.FOR_LOOP: self._visit_block,
+            NodeType.WHILE_LOOP: self._visit_loop,
+            NodeType.DO_WHILE_LOOP: self._visit_do_while_loop,
+            NodeType.IF_STATEMENT: self._visit_if_statement,
+            NodeType.RETURN_STATEMENT: self._visit_return_statement,
+            # Nothing to do for literals
+            NodeType.LITERAL: None,
+            # Already reported in parser
+            NodeType.ERROR: None,
+        }
     
     def analyze(self):
         self._analyze_node(self.ast)
         return {"valid": len(self.errors) == 0, "errors": self.errors}
     
-    def _analyze_node(self, node):
-        if node.type == "Program":
-            for child in node.children:
-                self._analyze_node(child)
+    def _report(self, message):
+        self.errors.append(message)
+        if len(self.errors) >= self._MAX_ERRORS:
+            self.errors.append("Too many errors, analysis stopped")
+            self._aborted = True
+    
+    def _define(self, name, type_name):
+        symbol = Symbol(name, type_name, len(self.scope_stack) - 1)
+        self.scope_stack[-1][name] = symbol
+        return symbol
+    
+    def _resolve(self, name):
+        for scope in reversed(self.scope_stack):
+            if name in scope:
+                return scope[name]
+        return None
+    
+    def _analyze_node(self, root):
+        # Walk the tree with an explicit work stack instead of recursion. Entries
+        # are either nodes to visit or (action, argument) pairs that handlers
+        # push beneath a node's children to run once those have been analyzed.
+        stack = self._stack = [root]
+        handlers = self._handlers
+        visit_children = self._visit_children
         
-        elif node.type == "Block":
-            # Create new scope for block
-            parent_scope = self.current_scope
-            self.current_scope = Scope(parent_scope, parent_scope.level + 1)
-            
-            for child in node.children:
-                self._analyze_node(child)
+        while stack and not self._aborted:
+            item = stack.pop()
+            if item.__class__ is tuple:
+                action, argument = item
+                action(argument)
+                continue
             
-            # Restore parent scope
-            self.current_scope = parent_scope
+            handler = handlers.get(item.type, visit_children)
+            if handler is not None:
+                handler(item, item.children)
+    
+    def _enter_scope(self, _):
+        self.scope_stack.append({})
+    
+    def _exit_scope(self, _):
+        self.scope_stack.pop()
+    
+    def _visit_children(self, node, kids):
+        # Analyze child nodes, skipping subtrees with nothing to check
+        self._stack.extend([child for child in reversed(kids) if child.type in _MAY_CONTAIN_INTERESTING])
+    
+    def _visit_block(self, node, kids):
+        # Create new scope for block (loops also scope their initialization),
+        # restored once every child has been analyzed
+        self.scope_stack.append({})
+        self._stack.append((self._exit_scope, None))
+        self._stack.extend(reversed(kids))
+    
+    def _visit_variable_declaration(self, node, kids):
+        var_type = node.value
+        var_name = kids[0].value
         
-        elif node.type == "VariableDeclaration":
-            var_type = node.value
-            var_name = node.children[0].value
-            
-            # Check if variable is already defined in current scope
-            if var_name in self.current_scope.symbols:
-                self.errors.append(f"Variable '{var_name}' is already defined in this scope")
-            else:
-                symbol = self.current_scope.define(var_name, var_type)
-                
-                # Check for initialization
-                if len(node.children) > 1:
-                    init_expr = node.children[1]
-                    self._analyze_node(init_expr)
-                    symbol.initialized = True
-                    
-                    # Type checking for initialization
-                    if init_expr.type == "Literal":
-                        # Simple type check for literals
-                        literal_value = init_expr.value
-                        if var_type == "int":
-                            if literal_value.startswith('"') or literal_value.startswith("'"):
-                                self.errors.append(f"Cannot initialize int variable '{var_name}' with string literal")
-                        elif var_type == "float" or var_type == "double":
-                            if literal_value.startswith('"') or literal_value.startswith("'"):
-                                self.errors.append(f"Cannot initialize {var_type} variable '{var_name}' with string literal")
-                        elif var_type == "char":
-                            if not (literal_value.startswith("'") and len(literal_value) == 3):
-                                self.errors.append(f"Invalid character literal for variable '{var_name}'")
-        
-        elif node.type == "Identifier":
-            var_name = node.value
-            symbol = self.current_scope.resolve(var_name)
-            
-            if not symbol:
-                self.errors.append(f"Undefined variable '{var_name}'")
-            else:
-                symbol.used = True
-                
-                # Check if variable is used before initialization
-                if not symbol.initialized:
-                    self.errors.append(f"Variable '{var_name}' is used before initialization")
-        
-        elif node.type == "Assignment":
-            # Check left side is an identifier
-            if node.children[0].type != "Identifier":
-                self.errors.append("Left side of assignment must be a variable")
-                return
-            
-            var_name = node.children[0].value
-            symbol = self.current_scope.resolve(var_name)
-            
-            if not symbol:
-                self.errors.append(f"Undefined variable '{var_name}'")
-            else:
-                # Mark as initialized
-                symbol.initialized = True
-                
-                # Check right side
-                self._analyze_node(node.children[1])
-                
-                # Type checking for assignment
-                if node.children[1].type == "Literal":
-                    literal_value = node.children[1].value
-                    if symbol.type == "int":
-                        if literal_value.startswith('"') or literal_value.startswith("'"):
-                            self.errors.append(f"Cannot assign string literal to int variable '{var_name}'")
-                    elif symbol.type == "float" or symbol.type == "double":
-                        if literal_value.startswith('"') or literal_value.startswith("'"):
-                            self.errors.append(f"Cannot assign string literal to {symbol.type} variable '{var_name}'")
-                    elif symbol.type == "char":
-                        if not (literal_value.startswith("'") and len(literal_value) == 3):
-                            self.errors.append(f"Invalid character literal for variable '{var_name}'")
-        
-        elif node.type == "BinaryOp":
-            # Analyze operands
-            self._analyze_node(node.children[0])
-            self._analyze_node(node.children[1])
-            
-            # Type checking for binary operations
-            if node.value in ["+", "-", "*", "/", "%"] and node.children[0].type == "Identifier" and node.children[1].type == "Identifier":
-                left_symbol = self.current_scope.resolve(node.children[0].value)
-                right_symbol = self.current_scope.resolve(node.children[1].value)
-                
-                if left_symbol and right_symbol:
-                    if left_symbol.type == "char" or right_symbol.type == "char":
-                        if node.value == "%":
-                            self.errors.append(f"Cannot use modulo operator '%' with char operands")
-        
-        elif node.type == "UnaryOp":
-            # Analyze operand
-            self._analyze_node(node.children[0])
-            
-            # Type checking for unary operations
-            if node.value in ["++", "--"] and node.children[0].type == "Identifier":
-                symbol = self.current_scope.resolve(node.children[0].value)
-                if symbol and symbol.type not in ["int", "float", "double"]:
-                    self.errors.append(f"Cannot use increment/decrement operator with non-numeric type '{symbol.type}'")
-        
-        elif node.type == "ForLoop":
-            # Create new scope for loop
-            parent_scope = self.current_scope
-            self.current_scope = Scope(parent_scope, parent_scope.level + 1)
-            
-            # Analyze initialization, condition, and increment
-            for child in node.children:
-                self._analyze_node(child)
-            
-            # Restore parent scope
-            self.current_scope = parent_scope
+        # Check if variable is already defined in current scope
+        if var_name in self.scope_stack[-1]:
+            self._report(f"Variable '{var_name}' is already defined in this scope")
+            return
         
-        elif node.type == "WhileLoop" or node.type == "DoWhileLoop":
-            # Analyze condition
-            self._analyze_node(node.children[0])
-            
-            # Create new scope for loop
-            parent_scope = self.current_scope
-            self.current_scope = Scope(parent_scope, parent_scope.level + 1)
-            
-            # Analyze body
-            for i in range(1, len(node.children)):
-                self._analyze_node(node.children[i])
-            
-            # Restore parent scope
-            self.current_scope = parent_scope
+        symbol = self._define(var_name, var_type)
         
-        elif node.type == "IfStatement":
-            # Analyze condition
-            self._analyze_node(node.children[0])
-            
-            # Create new scope for then branch
-            parent_scope = self.current_scope
-            self.current_scope = Scope(parent_scope, parent_scope.level + 1)
-            
-            # Analyze then branch
-            if len(node.children) > 1:
-                self._analyze_node(node.children[1])
+        # Check for initialization
+        if len(kids) > 1:
+            self._stack.append((self._finish_variable_declaration, (node, symbol)))
+            self._stack.append(kids[1])
+    
+    def _finish_variable_declaration(self, argument):
+        node, symbol = argument
+        init_expr = node.children[1]
+        symbol.initialized = True
+        
+        # Type checking for initialization
+        if init_expr.type == _LITERAL:
+            error = _check_literal_compat(node.value, init_expr.value, symbol.name)
+            if error:
+                self._report(error)
+    
+    def _visit_identifier(self, node, kids):
+        var_name = node.value
+        symbol = self._resolve(var_name)
+        self._resolved[node] = symbol
+        
+        if not symbol:
+            self._report(f"Undefined variable '{var_name}'")
+        else:
+            symbol.used = True
             
-            # Restore parent scope
-            self.current_scope = parent_scope
+            # Check if variable is used before initialization
+            if not symbol.initialized:
+                self._report(f"Variable '{var_name}' is used before initialization")
+    
+    def _visit_assignment(self, node, kids):
+        # Check left side is an identifier
+        if kids[0].type != _IDENTIFIER:
+            self._report("Left side of assignment must be a variable")
+            return
+        
+        var_name = kids[0].value
+        symbol = self._resolve(var_name)
+        
+        if not symbol:
+            self._report(f"Undefined variable '{var_name}'")
+            return
+        
+        # Mark as initialized
+        symbol.initialized = True
+        
+        # Check right side
+        self._stack.append((self._finish_assignment, (node, symbol)))
+        self._stack.append(kids[1])
+    
+    def _finish_assignment(self, argument):
+        node, symbol = argument
+        value_expr = node.children[1]
+        
+        # Type checking for assignment
+        if value_expr.type == _LITERAL:
+            error = _check_literal_compat(symbol.type, value_expr.value, symbol.name, assignment=True)
+            if error:
+                self._report(error)
+    
+    def _visit_binary_op(self, node, kids):
+        # Analyze operands, then type check
+        self._stack.append((self._finish_binary_op, node))
+        self._stack.append(kids[1])
+        self._stack.append(kids[0])
+    
+    def _finish_binary_op(self, node):
+        kids = node.children
+        
+        # Type checking for binary operations
+        if node.value in ["+", "-", "*", "/", "%"] and kids[0].type == _IDENTIFIER and kids[1].type == _IDENTIFIER:
+            left_symbol = self._resolved[kids[0]]
+            right_symbol = self._resolved[kids[1]]
             
-            # Create new scope for else branch
-            if len(node.children) > 2:
-                self.current_scope = Scope(parent_scope, parent_scope.level + 1)
-                self._analyze_node(node.children[2])
-                self.current_scope = parent_scope
-        
-        elif node.type == "ReturnStatement":
-            # Analyze return value
-            if node.children:
-                self._analyze_node(node.children[0])
-        
-        elif node.type == "Literal":
-            # Nothing to do for literals
-            pass
+            if left_symbol and right_symbol:
+                if left_symbol.type == "char" or right_symbol.type == "char":
+                    if node.value == "%":
+                        self._report(f"Cannot use modulo operator '%' with char operands")
+    
+    def _visit_unary_op(self, node, kids):
+        # Analyze operand, then type check
+        self._stack.append((self._finish_unary_op, node))
+        self._stack.append(kids[0])
+    
+    def _finish_unary_op(self, node):
+        operand = node.children[0]
         
-        elif node.type == "Error":
-            # Already reported in parser
-            pass
+        # Type checking for unary operations
+        if node.value in ["++", "--"] and operand.type == _IDENTIFIER:
+            symbol = self._resolved[operand]
+            if symbol and symbol.type not in ["int", "float", "double"]:
+                self._report(f"Cannot use increment/decrement operator with non-numeric type '{symbol.type}'")
+    
+    def _visit_loop(self, node, kids):
+        stack = self._stack
         
-        else:
-            # Analyze child nodes
-            for child in node.children:
-                self._analyze_node(child)
\ No newline at end of file
+        # Analyze condition, then the body in a new scope
+        stack.append((self._exit_scope, None))
+        stack.extend(reversed(kids[1:]))
+        stack.append((self._enter_scope, None))
+        stack.append(kids[0])
+    
+    def _visit_do_while_loop(self, node, kids):
+        stack = self._stack
+        
+        # The body runs before the condition is first checked, so analyze it
+        # first (in a new scope), then the condition
+        stack.append(kids[0])
+        stack.append((self._exit_scope, None))
+        stack.extend(reversed(kids[1:]))
+        stack.append((self._enter_scope, None))
+    
+    def _visit_if_statement(self, node, kids):
+        stack = self._stack
+        
+        # Else branch gets its own scope
+        if len(kids) > 2:
+            stack.append((self._exit_scope, None))
+            stack.append(kids[2])
+            stack.append((self._enter_scope, None))
+        
+        # Then branch gets a new scope
+        stack.append((self._exit_scope, None))
+        if len(kids) > 1:
+            stack.append(kids[1])
+        stack.append((self._enter_scope, None))
+        
+        # Analyze condition first
+        stack.append(kids[0])
+    
+    def _visit_return_statement(self, node, kids):
+        # Analyze return value
+        if kids:
+            self._stack.append(kids[0])
@@ -1,22 +1,19 @@
+from collections import namedtuple
+
+ErrorRecord = namedtuple('ErrorRecord', 'type message line column')
+
 class ErrorHandler:
     def __init__(self):
         self.errors = []
     
     def add_error(self, error_type, message, line, column):
         """Add an error with type, message, and location."""
-        self.errors.append({
-            'type': error_type,
-            'message': message,
-            'line': line,
-            'column': column
-        })
+        self.errors.append(ErrorRecord(error_type, message, line, column))
     
     def format_errors(self):
         """Format all errors into a readable string."""
-        formatted = []
-        for error in self.errors:
-            formatted.append(f"{error['type']} Error at line {error['line']}, column {error['column']}: {error['message']}")
-        return '\n'.join(formatted)
+        return '\n'.join(f"{error.type} Error at line {error.line}, column {error.column}: {error.message}"
+                         for error in self.errors)
     
     def get_errors(self):
         """Get the list of errors."""
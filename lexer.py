@@ -1,4 +1,6 @@
+import bisect
 import re
+import sys
 from enum import Enum, auto
 
 class TokenType(Enum):
@@ -15,6 +17,8 @@ class TokenType(Enum):
     WHITESPACE = auto()
     PREPROCESSOR = auto()
     UNKNOWN = auto()
+    # Never produced by the lexer; marks the end of the parser's token arrays
+    EOF = auto()
 
 class Token:
     def __init__(self, token_type, value, line, column):
@@ -26,107 +30,172 @@ class Token:
     def __repr__(self):
         return f"Token({self.type}, '{self.value}', line={self.line}, col={self.column})"
 
+# Keywords, built once at import
+_KEYWORDS = frozenset(sys.intern(keyword) for keyword in (
+    # Basic Data Types
+    "char", "int", "float", "double", "bool", "long", "short", "string",
+
+    # Looping Keywords
+    "for", "while", "do",
+
+    # Arithmetic & Operators
+    "return",
+
+    # Conditionals (Useful for Loops)
+    "if", "else", "break", "switch", "case", "default"
+))
+
+# Identifier text -> token type; anything not listed stays an identifier
+_IDENTIFIER_TYPES = dict.fromkeys(_KEYWORDS, TokenType.KEYWORD)
+
+def _build_master_pattern(token_specs):
+    # Combine all patterns into a single alternation, one named group per spec
+    group_types = {}
+    alternatives = []
+    for index, (regex, token_type) in enumerate(token_specs):
+        group = f"T{index}"
+        group_types[group] = token_type
+        alternatives.append(f"(?P<{group}>{regex})")
+    return re.compile("|".join(alternatives)), group_types
+
 class Lexer:
+    # Regular expressions for tokens
+    _TOKEN_SPECS = [
+        # Whitespace
+        (r'[ \t\r\f]+', TokenType.WHITESPACE),
+        # Newline
+        (r'\n', TokenType.WHITESPACE),
+        # C++ style comments
+        (r'//.*', TokenType.COMMENT),
+        # C style comments
+        (r'(?s:/\*.*?\*/)', TokenType.COMMENT),
+        # Preprocessor directives
+        (r'#\w+.*', TokenType.PREPROCESSOR),
+        # Character literals
+        (r"'(?:\\.|[^'\\\n])'", TokenType.CHAR_LITERAL),
+        # String literals (unrolled loop, so a failed match never backtracks
+        # through alternatives)
+        (r'"[^"\\\n]*(?:\\.[^"\\\n]*)*"', TokenType.STRING_LITERAL),
+        # Floating point literals
+        (r'\d+\.\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?|\d+[eE][+-]?\d+', TokenType.LITERAL),
+        # Integer literals
+        (r'0[xX][0-9a-fA-F]+|\d+', TokenType.LITERAL),
+        # Boolean literals 
+        (r'\btrue\b|\bfalse\b', TokenType.BOOL_LITERAL),
+        # Operators
+        (r'--|\+\+|==|!=|<=|>=|&&|\|\||<<|>>|->|::|[+\-*/%=&|^~!<>?:.]', TokenType.OPERATOR),
+        # Separators
+        (r'[(){}\[\];,]', TokenType.SEPARATOR),
+        # Identifiers
+        (r'[a-zA-Z_]\w*', TokenType.IDENTIFIER),
+        # Anything else
+        (r'.', TokenType.UNKNOWN)
+    ]
+    
+    # Compiled once at import rather than per Lexer instance
+    _MASTER_PATTERN, _GROUP_TYPES = _build_master_pattern(_TOKEN_SPECS)
+    
     def __init__(self, code):
         self.code = code
         self.tokens = []
-        self.current_pos = 0
-        self.line = 1
-        self.column = 1
+    
+    def tokenize(self):
+        self.tokens = self._scan(0, 1, 0)
+        return self.tokens
+    
+    def retokenize(self, old_tokens, old_line_count, first_line, tail_lines):
+        # Re-lex after an edit, given the tokens of the previous version of the
+        # code. Lines before first_line and the last tail_lines lines are
+        # unchanged; everything in between is scanned again until the scan
+        # lines up with an old token inside the unchanged tail, and the rest
+        # of the old tokens are reused from there.
+        code = self.code
+        line_count = code.count('\n') + 1
+        line_delta = line_count - old_line_count
         
-        # Keywords
-        self.keywords = {
-            # Basic Data Types
-            "char", "int", "float", "double", "bool", "long", "short", "string",
-
-            # Looping Keywords
-            "for", "while", "do",
-
-            # Arithmetic & Operators
-            "return",
-
-            # Conditionals (Useful for Loops)
-            "if", "else", "break", "switch", "case", "default"
-        }
+        # Tokens starting before the dirty lines are kept, unless one is a
+        # block comment running into them
+        keep = bisect.bisect_left(old_tokens, first_line, key=lambda token: token.line)
+        restart_line = first_line
+        restart_column = 1
+        if keep:
+            last = old_tokens[keep - 1]
+            if last.line + last.value.count('\n') >= first_line:
+                keep -= 1
+                restart_line = last.line
+                restart_column = last.column
         
-        # Regular expressions for tokens
-        self.token_specs = [
-            # Whitespace
-            (r'[ \t\r\f]+', TokenType.WHITESPACE),
-            # Newline
-            (r'\n', TokenType.WHITESPACE),
-            # C++ style comments
-            (r'//.*', TokenType.COMMENT),
-            # C style comments
-            (r'/\*.*?\*/', TokenType.COMMENT, re.DOTALL),
-            # Preprocessor directives
-            (r'#\w+.*?(?:\n|$)', TokenType.PREPROCESSOR),
-            # Character literals
-            (r"'(?:\\.|[^'\\])'", TokenType.CHAR_LITERAL),
-            # String literals
-            (r'"(?:\\.|[^"\\])*"', TokenType.STRING_LITERAL),
-            # String literals
-            (r'"(?:\\.|[^"\\])*"', TokenType.LITERAL),
-            # Floating point literals
-            (r'\d+\.\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?|\d+[eE][+-]?\d+', TokenType.LITERAL),
-            # Integer literals
-            (r'0[xX][0-9a-fA-F]+|\d+', TokenType.LITERAL),
-            # Boolean literals 
-            (r'\btrue\b|\bfalse\b', TokenType.BOOL_LITERAL),
-            # Operators
-            (r'--|\+\+|==|!=|<=|>=|&&|\|\||<<|>>|->|::|[+\-*/%=&|^~!<>?:.]', TokenType.OPERATOR),
-            # Separators
-            (r'[(){}\[\];,]', TokenType.SEPARATOR),
-            # Identifiers
-            (r'[a-zA-Z_]\w*', TokenType.IDENTIFIER),
-            # Anything else
-            (r'.', TokenType.UNKNOWN)
-        ]
+        line_start = 0
+        for _ in range(restart_line - 1):
+            line_start = code.index('\n', line_start) + 1
         
-        # Compile patterns
-        self.patterns = []
-        for pattern in self.token_specs:
-            if len(pattern) == 2:
-                regex, token_type = pattern
-                flags = 0
-            else:
-                regex, token_type, flags = pattern
-            self.patterns.append((re.compile(regex, flags), token_type))
-    
-    def tokenize(self):
-        self.tokens = []
+        restart = line_start + restart_column - 1
+        tokens = self._scan(restart, restart_line, line_start,
+                            old_tokens, line_count - tail_lines + 1, line_delta)
         
-        # Split code into lines for better error reporting
-        lines = self.code.split('\n')
+        # A "*/" typed into the rescanned code can close a "/*" that used to run
+        # to the end of the file, which changes the kept tokens too
+        if code.find('*/', max(restart - 1, 0), self._scan_end) != -1 and code.find('/*', 0, restart) != -1:
+            return self.tokenize()
         
-        for line_num, line in enumerate(lines, 1):
-            col = 1
-            pos = 0
+        self.tokens = old_tokens[:keep]
+        self.tokens.extend(tokens)
+        return self.tokens
+    
+    def _scan(self, pos, line_num, line_start, old_tokens=None, resync_line=sys.maxsize, line_delta=0):
+        tokens = []
+        group_types = self._GROUP_TYPES
+        identifier_types = _IDENTIFIER_TYPES
+        code = self.code
+        
+        # One regex engine call per token, dispatching on the matched group
+        for match in self._MASTER_PATTERN.finditer(code, pos):
+            start = match.start()
+            if start != pos:
+                # If no pattern matches, raise an error
+                raise ValueError(f"Unknown token at line {line_num}, column {pos - line_start + 1}: '{code[pos]}'")
+            
+            token_type = group_types[match.lastgroup]
+            pos = match.end()
+            
+            # Skip whitespace tokens
+            if token_type == TokenType.WHITESPACE:
+                if code[start] == '\n':
+                    line_num += 1
+                    line_start = pos
+                continue
+            
+            column = start - line_start + 1
+            
+            # Back in unchanged code: if an old token starts at the same spot,
+            # the rest of the old tokens only need their lines shifted
+            if line_num >= resync_line:
+                old_line = line_num - line_delta
+                index = bisect.bisect_left(old_tokens, (old_line, column),
+                                           key=lambda token: (token.line, token.column))
+                if index < len(old_tokens) and old_tokens[index].line == old_line and old_tokens[index].column == column:
+                    if line_delta:
+                        tokens.extend(Token(token.type, token.value, token.line + line_delta, token.column)
+                                      for token in old_tokens[index:])
+                    else:
+                        tokens.extend(old_tokens[index:])
+                    self._scan_end = start
+                    return tokens
+            
+            value = match.group()
+            
+            # Check if identifier is a keyword
+            if token_type == TokenType.IDENTIFIER:
+                token_type = identifier_types.get(value, token_type)
+            
+            tokens.append(Token(token_type, value, line_num, column))
             
-            while pos < len(line):
-                match = None
-                
-                # Try to match each pattern
-                for pattern, token_type in self.patterns:
-                    regex_match = pattern.match(line, pos)
-                    if regex_match:
-                        match = regex_match
-                        value = match.group(0)
-                        
-                        # Skip whitespace tokens
-                        if token_type != TokenType.WHITESPACE:
-                            # Check if identifier is a keyword
-                            if token_type == TokenType.IDENTIFIER and value in self.keywords:
-                                token_type = TokenType.KEYWORD
-                            
-                            self.tokens.append(Token(token_type, value, line_num, col))
-                        
-                        col += len(value)
-                        pos = match.end()
-                        break
-                
-                if not match:
-                    # If no pattern matches, raise an error
-                    raise ValueError(f"Unknown token at line {line_num}, column {col}: '{line[pos]}'")
+            # Block comments may span several lines
+            if token_type == TokenType.COMMENT:
+                newlines = value.count('\n')
+                if newlines:
+                    line_num += newlines
+                    line_start = start + value.rfind('\n') + 1
         
-        return self.tokens
\ No newline at end of file
+        self._scan_end = len(code)
+        return tokens
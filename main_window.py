@@ -1,14 +1,13 @@
 import os
+import threading
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                           QTextEdit, QPushButton, QSplitter, QStatusBar, 
+                           QPushButton, QSplitter, QStatusBar, 
                            QPlainTextEdit)
 from PyQt5.QtGui import QFont, QColor, QPainter 
-from PyQt5.QtCore import Qt, QSize, QRect 
+from PyQt5.QtCore import (Qt, QSize, QRect, QEvent, QTimer, QObject, QThread, 
+                          pyqtSignal, pyqtSlot)
 
-from syntax_highlighter import SyntaxHighlighter
-from lexer import Lexer
-from parser import Parser
-from analyzer import SemanticAnalyzer
+from syntax_highlighter import ViewportSyntaxHighlighter
 from error_handler import ErrorHandler
 
 class LineNumberArea(QWidget):
@@ -23,15 +22,53 @@ class LineNumberArea(QWidget):
         self.codeEditor.lineNumberAreaPaintEvent(event)
 
 class CodeEditorWithLineNumbers(QPlainTextEdit):
+    # Documents larger than this many characters are left unhighlighted
+    HIGHLIGHT_LIMIT = 500000
+    
+    highlightingChanged = pyqtSignal(bool)
+    
+    # Gutter colors, built once instead of on every paint
+    _BG = QColor(Qt.lightGray).lighter(120)
+    _FG = QColor(Qt.darkGray)
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.lineNumberArea = LineNumberArea(self)
         
+        # Gutter width is only recomputed when the digit count or font changes
+        self._cached_block_count = -1
+        self._cached_digits = -1
+        self._cached_width = 0
+        # Font metrics are fetched once per font rather than per paint
+        self._fm = self.fontMetrics()
+        self._digit_advance = self._fm.horizontalAdvance('9')
+        
+        # Margin changes are coalesced, so holding Enter relayouts the
+        # viewport once rather than per new line
+        self._margin_timer = QTimer(self)
+        self._margin_timer.setSingleShot(True)
+        self._margin_timer.setInterval(30)
+        self._margin_timer.timeout.connect(self.applyLineNumberAreaWidth)
+        
+        # Highlighting is limited to the visible blocks and catches up on scroll.
+        # The catch-up runs from the event loop, since rehighlighting a block
+        # emits updateRequest again and the document can't be swapped mid-edit
+        self.highlighter = ViewportSyntaxHighlighter(self.document())
+        self._highlighting_enabled = True
+        self._highlight_timer = QTimer(self)
+        self._highlight_timer.setSingleShot(True)
+        self._highlight_timer.setInterval(0)
+        self._highlight_timer.timeout.connect(self.highlightVisibleBlocks)
+        
         self.blockCountChanged.connect(self.updateLineNumberAreaWidth)
+        self.blockCountChanged.connect(self.resetHighlightedBlocks)
+        self.textChanged.connect(self.scheduleHighlighting)
         self.updateRequest.connect(self.updateLineNumberArea)
+        self.updateRequest.connect(self.scheduleHighlighting)
+        self.verticalScrollBar().valueChanged.connect(self.scheduleHighlighting)
         
         # Initialize
-        self.updateLineNumberAreaWidth(0)
+        self.applyLineNumberAreaWidth()
         #self.highlightCurrentLine()
         
         # Set font for code editor
@@ -40,19 +77,40 @@ class CodeEditorWithLineNumbers(QPlainTextEdit):
         
         # Set placeholder text
         self.setPlaceholderText("Enter your code here...")
+        
+        # Lines edited since the last takeDirtyLines(), so validation only
+        # has to re-lex those. Highlighting changes are formatting only.
+        self._restyling = False
+        self._dirty_lines = None
+        self.document().contentsChange.connect(self.trackDirtyLines)
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.FontChange:
+            self._fm = self.fontMetrics()
+            self._digit_advance = self._fm.horizontalAdvance('9')
+            self._cached_block_count = -1
+            self._cached_digits = -1
+            self.applyLineNumberAreaWidth()
 
     def lineNumberAreaWidth(self):
-        digits = 1
-        max_value = max(1, self.blockCount())
-        while max_value >= 10:
-            max_value //= 10
-            digits += 1
-            
-        space = 3 + self.fontMetrics().horizontalAdvance('9') * digits
-        return space
+        block_count = self.blockCount()
+        if block_count != self._cached_block_count:
+            self._cached_block_count = block_count
+            digits = len(str(max(1, block_count)))
+            if digits != self._cached_digits:
+                self._cached_digits = digits
+                self._cached_width = 3 + self._digit_advance * digits
+        return self._cached_width
 
     def updateLineNumberAreaWidth(self, _):
-        self.setViewportMargins(self.lineNumberAreaWidth(), 0, 0, 0)
+        if self.lineNumberAreaWidth() != self.viewportMargins().left():
+            self._margin_timer.start()
+
+    def applyLineNumberAreaWidth(self):
+        width = self.lineNumberAreaWidth()
+        if width != self.viewportMargins().left():
+            self.setViewportMargins(width, 0, 0, 0)
 
     def updateLineNumberArea(self, rect, dy):
         if dy:
@@ -63,6 +121,87 @@ class CodeEditorWithLineNumbers(QPlainTextEdit):
         if rect.contains(self.viewport().rect()):
             self.updateLineNumberAreaWidth(0)
 
+    def resetHighlightedBlocks(self, _):
+        # Block numbers shift when lines come and go
+        self.highlighter.highlighted_blocks.clear()
+
+    def setHighlightingEnabled(self, enabled):
+        if enabled == self._highlighting_enabled:
+            return
+        
+        self._highlighting_enabled = enabled
+        self.highlighter.highlighted_blocks.clear()
+        self._restyling = True
+        self.highlighter.setDocument(self.document() if enabled else None)
+        self._restyling = False
+        self.highlightingChanged.emit(enabled)
+
+    def checkDocumentSize(self):
+        self.setHighlightingEnabled(self.document().characterCount() <= self.HIGHLIGHT_LIMIT)
+
+    def insertFromMimeData(self, source):
+        # Detach before a large paste instead of highlighting it first
+        if self.document().characterCount() + len(source.text()) > self.HIGHLIGHT_LIMIT:
+            self.setHighlightingEnabled(False)
+        
+        # Highlight nothing while the paste goes in; the visible blocks are
+        # caught up once it has been laid out
+        self.highlighter.setVisibleRange(0, -1)
+        super().insertFromMimeData(source)
+
+    def scheduleHighlighting(self, *_):
+        self._highlight_timer.start()
+
+    def highlightVisibleBlocks(self):
+        self.checkDocumentSize()
+        if not self._highlighting_enabled:
+            return
+        
+        block = self.firstVisibleBlock()
+        first = block.blockNumber()
+        last = first
+        top = self.blockBoundingGeometry(block).translated(self.contentOffset()).top()
+        height = self.viewport().height()
+
+        pending = []
+        highlighted = self.highlighter.highlighted_blocks
+        while block.isValid() and top <= height:
+            last = block.blockNumber()
+            if last not in highlighted:
+                pending.append(block)
+            top += self.blockBoundingRect(block).height()
+            block = block.next()
+
+        self.highlighter.setVisibleRange(first, last)
+        self._restyling = True
+        for block in pending:
+            self.highlighter.rehighlightBlock(block)
+        self._restyling = False
+
+    def trackDirtyLines(self, position, removed, added):
+        if self._restyling:
+            return
+        
+        document = self.document()
+        line_count = document.blockCount()
+        end = min(position + added, document.characterCount() - 1)
+        first_line = max(document.findBlock(position).blockNumber() + 1, 1)
+        tail_lines = max(line_count - (document.findBlock(end).blockNumber() + 1), 0)
+        
+        # Lines before the first edit and after the last one stay put, counted
+        # from the top and the bottom respectively
+        if self._dirty_lines is not None:
+            first_line = min(first_line, self._dirty_lines[0])
+            tail_lines = min(tail_lines, self._dirty_lines[1])
+        self._dirty_lines = (first_line, tail_lines)
+
+    def takeDirtyLines(self):
+        # (first edited line, number of unedited lines at the end), or None
+        # if nothing changed
+        dirty_lines = self._dirty_lines
+        self._dirty_lines = None
+        return dirty_lines
+
     def resizeEvent(self, event):
         super().resizeEvent(event)
         cr = self.contentsRect()
@@ -70,26 +209,134 @@ class CodeEditorWithLineNumbers(QPlainTextEdit):
 
     def lineNumberAreaPaintEvent(self, event):
         painter = QPainter(self.lineNumberArea)
-        painter.fillRect(event.rect(), QColor(Qt.lightGray).lighter(120))
+        painter.fillRect(event.rect(), CodeEditorWithLineNumbers._BG)
+        painter.setPen(CodeEditorWithLineNumbers._FG)
+        width = self.lineNumberArea.width() - 2
+        line_height = self._fm.height()
+        paint_top = event.rect().top()
+        paint_bottom = event.rect().bottom()
 
         block = self.firstVisibleBlock()
         blockNumber = block.blockNumber()
         top = round(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
-        bottom = top + round(self.blockBoundingRect(block).height())
 
-        while block.isValid() and top <= event.rect().bottom():
-            if block.isVisible() and bottom >= event.rect().top():
-                number = str(blockNumber + 1)
-                painter.setPen(QColor(Qt.darkGray))
-                painter.drawText(0, top, self.lineNumberArea.width() - 2, 
-                                self.fontMetrics().height(),
-                                Qt.AlignRight, number)
+        # Block heights are still read per block: wrapped lines make them vary.
+        # Hidden blocks take no space, so they aren't measured at all
+        while block.isValid() and top <= paint_bottom:
+            if block.isVisible():
+                bottom = top + round(self.blockBoundingRect(block).height())
+                if bottom >= paint_top:
+                    number = str(blockNumber + 1)
+                    painter.drawText(0, top, width, line_height, Qt.AlignRight, number)
+                top = bottom
 
             block = block.next()
-            top = bottom
-            bottom = top + round(self.blockBoundingRect(block).height())
             blockNumber += 1
             
+class ValidationWorker(QObject):
+    # Emitted with each stage's report lines as soon as the stage is done
+    stageCompleted = pyqtSignal(list)
+    # Emitted with the status bar message once validation stops
+    finished = pyqtSignal(str)
+    
+    def __init__(self, code, cancelled, previous=None):
+        super().__init__()
+        self.code = code
+        self.cancelled = cancelled
+        
+        # (tokens, line count, dirty lines) from the last validation, if any
+        self.previous = previous
+        self.tokens = None
+        if previous is not None and previous[2] is None:
+            self.tokens = previous[0]
+    
+    @pyqtSlot()
+    def run(self):
+        # The analysis modules are imported on first use to keep startup light
+        from validation_cache import source_hash, cache_lookup, cache_store
+        
+        # Unchanged sources replay the report saved by an earlier run
+        code_hash = source_hash(self.code)
+        cached = cache_lookup(code_hash)
+        if cached is not None:
+            reports, status = cached
+            for output in reports:
+                self.stageCompleted.emit(output)
+            self.finished.emit(status)
+            return
+        
+        reports = []
+        status = self.run_stages(reports)
+        if not self.cancelled.is_set():
+            cache_store(code_hash, (reports, status))
+        self.finished.emit(status)
+        
+    def run_stages(self, reports):
+        for stage in (self.lexical_analysis, self.syntax_analysis, self.semantic_analysis):
+            if self.cancelled.is_set():
+                return "Validation cancelled"
+            
+            output = []
+            failure = stage(output)
+            reports.append(output)
+            self.stageCompleted.emit(output)
+            if failure:
+                return failure
+        
+        # All validations passed
+        output = ["\n✓ Code is valid for execution!"]
+        reports.append(output)
+        self.stageCompleted.emit(output)
+        return "Validation completed successfully!"
+        
+    def lexical_analysis(self, output):
+        from lexer import Lexer
+        try:
+            lexer = Lexer(self.code)
+            if self.previous is None:
+                self.tokens = lexer.tokenize()
+            elif self.tokens is None:
+                # Only re-lex the lines edited since the last validation
+                old_tokens, old_line_count, dirty_lines = self.previous
+                self.tokens = lexer.retokenize(old_tokens, old_line_count, *dirty_lines)
+            output.append("Lexical Analysis: Completed")
+            output.append(f"Tokens identified: {len(self.tokens)}")
+        except Exception as e:
+            output.append(f"Lexical Analysis Error: {str(e)}")
+            return "Validation failed at lexical analysis"
+        
+    def syntax_analysis(self, output):
+        from parser import Parser
+        try:
+            parser = Parser(self.tokens)
+            self.syntax_result = parser.parse()
+            if self.syntax_result['valid']:
+                output.append("Syntax Analysis: Completed")
+            else:
+                output.append("Syntax Analysis: Failed")
+                for error in self.syntax_result['errors']:
+                    output.append(f"  - {error}")
+                return "Validation failed at syntax analysis"
+        except Exception as e:
+            output.append(f"Syntax Analysis Error: {str(e)}")
+            return "Validation failed at syntax analysis"
+        
+    def semantic_analysis(self, output):
+        from analyzer import SemanticAnalyzer
+        try:
+            semantic_analyzer = SemanticAnalyzer(self.syntax_result['ast'])
+            semantic_result = semantic_analyzer.analyze()
+            if semantic_result['valid']:
+                output.append("Semantic Analysis: Completed")
+            else:
+                output.append("Semantic Analysis: Failed")
+                for error in semantic_result['errors']:
+                    output.append(f"  - {error}")
+                return "Validation failed at semantic analysis"
+        except Exception as e:
+            output.append(f"Semantic Analysis Error: {str(e)}")
+            return "Validation failed at semantic analysis"
+
 # Main window class
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -109,12 +356,14 @@ class MainWindow(QMainWindow):
         splitter = QSplitter(Qt.Vertical)
         
         self.code_editor = CodeEditorWithLineNumbers()
-        self.highlighter = SyntaxHighlighter(self.code_editor.document())
+        self.highlighter = self.code_editor.highlighter
+        self.code_editor.highlightingChanged.connect(self.on_highlighting_changed)
         
         # Output panel
-        self.output_panel = QTextEdit()
+        self.output_panel = QPlainTextEdit()
         self.output_panel.setFont(QFont("Courier New", 12))
         self.output_panel.setReadOnly(True)
+        self.output_panel.setMaximumBlockCount(5000)
         
         splitter.addWidget(self.code_editor)
         splitter.addWidget(self.output_panel)
@@ -141,67 +390,80 @@ class MainWindow(QMainWindow):
 
         # Initialize analysis modules
         self.error_handler = ErrorHandler()
+        self._validation_thread = None
+        self._validation_worker = None
+        self._last_tokens = None
+        self._last_line_count = 0
+        
+    def on_highlighting_changed(self, enabled):
+        if enabled:
+            self.status_bar.showMessage("Highlighting enabled")
+        else:
+            self.status_bar.showMessage("Highlighting disabled (large file)")
         
     def validate_code(self):
         code = self.code_editor.toPlainText()
-        self.output_panel.clear()
         
-        if not code.strip():
-            self.output_panel.append("Error: No code to validate.")
+        # isspace() stops at the first visible character; strip() would copy the buffer
+        if not code or code.isspace():
+            self.output_panel.setPlainText("Error: No code to validate.")
             return
         
         self.status_bar.showMessage("Validating code...")
+        self.output_panel.clear()
+        self.validate_button.setEnabled(False)
         
-        # Step 1: Lexical Analysis
-        try:
-            lexer = Lexer(code)
-            tokens = lexer.tokenize()
-            self.output_panel.append("Lexical Analysis: Completed")
-            self.output_panel.append(f"Tokens identified: {len(tokens)}")
-        except Exception as e:
-            self.output_panel.append(f"Lexical Analysis Error: {str(e)}")
-            self.status_bar.showMessage("Validation failed at lexical analysis")
-            return
+        # Run the analysis on a worker thread so the window stays responsive
+        dirty_lines = self.code_editor.takeDirtyLines()
+        previous = None
+        if self._last_tokens is not None:
+            previous = (self._last_tokens, self._last_line_count, dirty_lines)
+        self._validation_line_count = self.code_editor.blockCount()
         
-        # Step 2: Syntax Analysis
-        try:
-            parser = Parser(tokens)
-            syntax_result = parser.parse()
-            if syntax_result['valid']:
-                self.output_panel.append("Syntax Analysis: Completed")
-            else:
-                self.output_panel.append("Syntax Analysis: Failed")
-                for error in syntax_result['errors']:
-                    self.output_panel.append(f"  - {error}")
-                self.status_bar.showMessage("Validation failed at syntax analysis")
-                return
-        except Exception as e:
-            self.output_panel.append(f"Syntax Analysis Error: {str(e)}")
-            self.status_bar.showMessage("Validation failed at syntax analysis")
-            return
+        self._cancel_validation = threading.Event()
+        self._validation_thread = QThread(self)
+        self._validation_worker = ValidationWorker(code, self._cancel_validation, previous)
+        self._validation_worker.moveToThread(self._validation_thread)
         
-        # Step 3: Semantic Analysis
-        try:
-            semantic_analyzer = SemanticAnalyzer(syntax_result['ast'])
-            semantic_result = semantic_analyzer.analyze()
-            if semantic_result['valid']:
-                self.output_panel.append("Semantic Analysis: Completed")
-            else:
-                self.output_panel.append("Semantic Analysis: Failed")
-                for error in semantic_result['errors']:
-                    self.output_panel.append(f"  - {error}")
-                self.status_bar.showMessage("Validation failed at semantic analysis")
-                return
-        except Exception as e:
-            self.output_panel.append(f"Semantic Analysis Error: {str(e)}")
-            self.status_bar.showMessage("Validation failed at semantic analysis")
-            return
+        self._validation_thread.started.connect(self._validation_worker.run)
+        self._validation_worker.stageCompleted.connect(self.on_stage_completed)
+        self._validation_worker.finished.connect(self.on_validation_finished)
+        self._validation_thread.finished.connect(self._validation_worker.deleteLater)
+        self._validation_thread.finished.connect(self._validation_thread.deleteLater)
+        self._validation_thread.start()
         
-        # All validations passed
-        self.output_panel.append("\n✓ Code is valid for execution!")
-        self.status_bar.showMessage("Validation completed successfully!")
+    def on_stage_completed(self, lines):
+        if not self._cancel_validation.is_set():
+            self.output_panel.appendPlainText("\n".join(lines))
+        
+    def on_validation_finished(self, status):
+        # Keep the tokens around for an incremental re-lex next time
+        self._last_tokens = None
+        if not self._cancel_validation.is_set():
+            self.status_bar.showMessage(status)
+            self._last_tokens = self._validation_worker.tokens
+            self._last_line_count = self._validation_line_count
+        
+        # The worker is done, but its thread is still unwinding; let it stop
+        # before dropping it, or closing the window right away would destroy
+        # a running QThread
+        self._validation_thread.quit()
+        self._validation_thread.wait()
+        self._validation_thread = None
+        self._validation_worker = None
+        self.validate_button.setEnabled(True)
         
     def clear_fields(self):
+        # A running validation finishes its current stage but reports nothing
+        if self._validation_thread is not None:
+            self._cancel_validation.set()
         self.code_editor.clear()
         self.output_panel.clear()
-        self.status_bar.showMessage("Ready")
\ No newline at end of file
+        self.status_bar.showMessage("Ready")
+        
+    def closeEvent(self, event):
+        if self._validation_thread is not None:
+            self._cancel_validation.set()
+            self._validation_thread.quit()
+            self._validation_thread.wait()
+        super().closeEvent(event)
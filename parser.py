@@ -1,25 +1,121 @@
+from enum import IntEnum, auto
+
 from lexer import TokenType 
 
+class NodeType(IntEnum):
+    PROGRAM = auto()
+    BLOCK = auto()
+    VARIABLE_DECLARATION = auto()
+    ASSIGNMENT = auto()
+    IDENTIFIER = auto()
+    LITERAL = auto()
+    BINARY_OP = auto()
+    UNARY_OP = auto()
+    POSTFIX_OP = auto()
+    FOR_LOOP = auto()
+    WHILE_LOOP = auto()
+    DO_WHILE_LOOP = auto()
+    IF_STATEMENT = auto()
+    SWITCH_STATEMENT = auto()
+    CASE_STATEMENT = auto()
+    DEFAULT_STATEMENT = auto()
+    BREAK_STATEMENT = auto()
+    RETURN_STATEMENT = auto()
+    ERROR = auto()
+    EMPTY = auto()
+
+# Node type -> display name, e.g. NodeType.BINARY_OP -> "BinaryOp"
+NODE_TYPE_NAMES = {node_type: "".join(part.capitalize() for part in node_type.name.split("_"))
+                   for node_type in NodeType}
+
+# Enum class attribute lookups are slow, so the node types built once per
+# expression or statement are bound here
+_ASSIGNMENT = NodeType.ASSIGNMENT
+_BINARY_OP = NodeType.BINARY_OP
+_UNARY_OP = NodeType.UNARY_OP
+_VARIABLE_DECLARATION = NodeType.VARIABLE_DECLARATION
+_IDENTIFIER = NodeType.IDENTIFIER
+_BLOCK = NodeType.BLOCK
+
+# Binary operator -> precedence, loosest first; anything else ends an expression
+_PRECEDENCE = {
+    "||": 1,
+    "&&": 2,
+    "==": 3, "!=": 3,
+    "<": 4, ">": 4, "<=": 4, ">=": 4,
+    "+": 5, "-": 5,
+    "*": 6, "/": 6, "%": 6,
+}
+
+# Operator and keyword classes, hashed once instead of scanning list literals
+_UNARY_OPS = frozenset(("+", "-", "!", "++", "--"))
+_POSTFIX_OPS = frozenset(("++", "--"))
+_TYPE_KWS = frozenset(("int", "float", "char", "double", "bool"))
+_CASE_END = frozenset(("case", "default", "}"))
+
+# Shared by every node without children; replaced by a list on the first add_child
+_NO_CHILDREN = ()
+
 class ASTNode:
+    __slots__ = ("type", "value", "children")
+    
     def __init__(self, node_type, value=None, children=None):
         self.type = node_type
         self.value = value
-        self.children = children if children is not None else []
+        self.children = children if children is not None else _NO_CHILDREN
     
     def add_child(self, child):
-        self.children.append(child)
+        if self.children is _NO_CHILDREN:
+            self.children = [child]
+        else:
+            self.children.append(child)
     
     def __repr__(self):
-        return f"ASTNode({self.type}, {self.value}, {len(self.children)} children)"
+        return f"ASTNode({NODE_TYPE_NAMES[self.type]}, {self.value}, {len(self.children)} children)"
+
+# Childless placeholders nothing ever modifies, so one of each is shared
+_EMPTY = ASTNode(NodeType.EMPTY)
+_ERROR = ASTNode(NodeType.ERROR)
 
 class Parser:
+    __slots__ = ("tokens", "current_index", "errors", "ast", "tok_type", "tok_value", "_n", "_parents", "_literals", "_identifiers", "_stmt_dispatch")
+    
     def __init__(self, tokens):
         self.tokens = tokens
         self.current_index = 0
         self.errors = []
-        self.ast = ASTNode("Program")
+        self.ast = ASTNode(NodeType.PROGRAM, None, [])
+        # Nodes that parsed statements are attached to, innermost last
+        self._parents = [self.ast]
+        # Value -> shared leaf node. Leaves are never modified after parsing,
+        # so every use of the same literal or variable can be one node.
+        self._literals = {}
+        self._identifiers = {}
+        
+        # Statement-opening token -> parse method, one lookup instead of an
+        # if-chain. Keyword and separator text only ever comes with that token
+        # type, so the value alone identifies the statement.
+        self._stmt_dispatch = {
+            "{": self._parse_block,
+            "int": self._parse_variable_declaration,
+            "float": self._parse_variable_declaration,
+            "long": self._parse_variable_declaration,
+            "short": self._parse_variable_declaration,
+            "char": self._parse_variable_declaration,
+            "double": self._parse_variable_declaration,
+            "bool": self._parse_variable_declaration,
+            "string": self._parse_variable_declaration,
+            "for": self._parse_for_loop,
+            "while": self._parse_while_loop,
+            "do": self._parse_do_while_loop,
+            "if": self._parse_if_statement,
+            "switch": self._parse_switch_statement,
+            "break": self._parse_break_statement,
+            "return": self._parse_return_statement,
+        }
     
     def parse(self):
+        self._ingest(self.tokens)
         try:
             self._parse_program()
             return {"valid": len(self.errors) == 0, "errors": self.errors, "ast": self.ast}
@@ -27,448 +123,376 @@ class Parser:
             self.errors.append(str(e))
             return {"valid": False, "errors": self.errors, "ast": self.ast}
     
+    def _ingest(self, tokens):
+        # Comments never affect the parse, so drop them once here rather than
+        # skipping over them in every rule
+        comment = TokenType.COMMENT
+        tokens = self.tokens = [token for token in tokens if token.type != comment]
+        
+        # Split types and values into parallel lists once, so the hot paths
+        # index a list instead of loading an attribute off a Token each time.
+        # Lines and columns are only needed for error messages, so those are
+        # still read off the tokens themselves.
+        self.tok_type = [token.type for token in tokens]
+        self.tok_value = [token.value for token in tokens]
+        # End with a sentinel that matches no keyword, operator or separator,
+        # so checks for a specific token can index one past the last real token
+        # without testing the bounds first
+        self.tok_type.append(TokenType.EOF)
+        self.tok_value.append("<eof>")
+        # The token list doesn't change while parsing, so its length is read once
+        self._n = len(tokens)
+    
     def _parse_program(self):
-        while self.current_index < len(self.tokens):
+        while self.current_index < self._n:
             try:
-                self._skip_comments() 
-                if self.current_index < len(self.tokens):
-                    self._parse_statement()
+                self._parse_statement()
             except Exception as e:
                 self.errors.append(str(e))
                 self._synchronize()
     
-    def _skip_comments(self):
-        while self.current_index < len(self.tokens) and self.tokens[self.current_index].type == TokenType.COMMENT:
-            self.current_index += 1
-    
     def _synchronize(self):
-        while self.current_index < len(self.tokens):
-            token = self.tokens[self.current_index]
-            self.current_index += 1
-            if token.value == ";" or token.value == "}":
-                return
+        values = self.tok_value
+        n = self._n
+        i = self.current_index
+        while i < n:
+            value = values[i]
+            i += 1
+            if value == ";" or value == "}":
+                break
+        self.current_index = i
     
     def _parse_statement(self):
-        if self.current_index >= len(self.tokens):
+        if self.current_index >= self._n:
             return
         
-        token = self.tokens[self.current_index]
-        
-        if token.type == TokenType.KEYWORD:
-            if token.value == "int" or token.value == "float" or token.value == "long" or token.value == "short" or \
-            token.value == "char" or token.value == "double" or token.value == "bool" or token.value == "string":
-                self._parse_variable_declaration()
-            elif token.value == "for":
-                self._parse_for_loop()
-            elif token.value == "while":
-                self._parse_while_loop()
-            elif token.value == "do":
-                self._parse_do_while_loop()
-            elif token.value == "if":
-                self._parse_if_statement()
-            elif token.value == "switch":  
-                self._parse_switch_statement() 
-            elif token.value == "break": 
-                self._parse_break_statement() 
-            elif token.value == "return":
-                self._parse_return_statement()
-            else:
-                self.current_index += 1
-                self.errors.append(f"Unsupported keyword: {token.value} at line {token.line}, column {token.column}")
-        elif token.type == TokenType.IDENTIFIER:
-            self._parse_expression_statement()
-        elif token.type == TokenType.SEPARATOR and token.value == "{":
-            self._parse_block()
-        elif token.type == TokenType.SEPARATOR and token.value == ";":
+        i = self.current_index
+        token_type = self.tok_type[i]
+        value = self.tok_value[i]
+        
+        node = None
+        handler = self._stmt_dispatch.get(value)
+        if handler:
+            node = handler()
+        elif token_type == TokenType.IDENTIFIER:
+            node = self._parse_expression_statement()
+        elif value == ";":
             self.current_index += 1  # Skip empty statements
+        elif token_type == TokenType.KEYWORD:
+            self.current_index += 1
+            self.errors.append(f"Unsupported keyword: {value} at line {self.tokens[i].line}, column {self.tokens[i].column}")
         else:
             self.current_index += 1
-            self.errors.append(f"Unexpected token: {token.value} at line {token.line}, column {token.column}")
+            self.errors.append(f"Unexpected token: {value} at line {self.tokens[i].line}, column {self.tokens[i].column}")
         
+        # Statements that failed to parse come back as None and are dropped
+        if node is not None:
+            self._parents[-1].children.append(node)
+    
     def _parse_variable_declaration(self):
-        type_token = self.tokens[self.current_index]
+        type_index = self.current_index
+        var_type = self.tok_value[type_index]
         self.current_index += 1
         
         # Parsing variable declarations until a semicolon
         while True:
-            self._skip_comments()
             
             # Check for identifier
-            if self.current_index >= len(self.tokens) or self.tokens[self.current_index].type != TokenType.IDENTIFIER:
-                self.errors.append(f"Expected identifier after {type_token.value} at line {type_token.line}, column {type_token.column}")
+            if self.tok_type[self.current_index] != TokenType.IDENTIFIER:
+                self.errors.append(f"Expected identifier after {var_type} at line {self.tokens[type_index].line}, column {self.tokens[type_index].column}")
                 return
             
-            var_node = ASTNode("VariableDeclaration", type_token.value)
-            
             # Get variable name
-            var_name = self.tokens[self.current_index]
-            var_node.add_child(ASTNode("Identifier", var_name.value))
+            name_index = self.current_index
+            var_node = ASTNode(_VARIABLE_DECLARATION, var_type, [ASTNode(_IDENTIFIER, self.tok_value[name_index])])
             self.current_index += 1
             
-            self._skip_comments()
-            
             # Check for initialization
-            if self.current_index < len(self.tokens) and self.tokens[self.current_index].value == "=":
+            if self.tok_value[self.current_index] == "=":
                 self.current_index += 1  # Skip '='
                 
-                self._skip_comments() 
-                
                 # Special handling for bool and char types
-                if self.current_index < len(self.tokens):
-                    value_token = self.tokens[self.current_index]
+                if self.current_index < self._n:
+                    value_index = self.current_index
+                    value_type = self.tok_type[value_index]
+                    value = self.tok_value[value_index]
                     
                     # Type-specific validation
-                    if type_token.value == "bool":
-                        if value_token.type != TokenType.BOOL_LITERAL:
-                            self.errors.append(f"Unexpected token in boolean expression: {value_token.value} at line {value_token.line}, column {value_token.column}")
+                    if var_type == "bool":
+                        if value_type != TokenType.BOOL_LITERAL:
+                            self.errors.append(f"Unexpected token in boolean expression: {value} at line {self.tokens[value_index].line}, column {self.tokens[value_index].column}")
                         else:
                             # Create literal node for boolean value
-                            expr_node = ASTNode("Literal", value_token.value)
-                            var_node.add_child(expr_node)
+                            expr_node = ASTNode(NodeType.LITERAL, value)
+                            var_node.children.append(expr_node)
                             self.current_index += 1  # Consume the boolean value
-                    elif type_token.value == "char":
-                        if value_token.type != TokenType.CHAR_LITERAL:
-                            self.errors.append(f"Unexpected token in char expression: {value_token.value} at line {value_token.line}, column {value_token.column}")
+                    elif var_type == "char":
+                        if value_type != TokenType.CHAR_LITERAL:
+                            self.errors.append(f"Unexpected token in char expression: {value} at line {self.tokens[value_index].line}, column {self.tokens[value_index].column}")
                         else:
                             # Create literal node for char value
-                            expr_node = ASTNode("Literal", value_token.value)
-                            var_node.add_child(expr_node)
+                            expr_node = ASTNode(NodeType.LITERAL, value)
+                            var_node.children.append(expr_node)
                             self.current_index += 1  # Consume the char value
-                    elif type_token.value == "string":
-                        if value_token.type != TokenType.STRING_LITERAL:
-                            self.errors.append(f"Unexpected token in string expression: {value_token.value} at line {value_token.line}, column {value_token.column}")
+                    elif var_type == "string":
+                        if value_type != TokenType.STRING_LITERAL:
+                            self.errors.append(f"Unexpected token in string expression: {value} at line {self.tokens[value_index].line}, column {self.tokens[value_index].column}")
                         else:
                             # Create literal node for string value
-                            expr_node = ASTNode("Literal", value_token.value)
-                            var_node.add_child(expr_node)
+                            expr_node = ASTNode(NodeType.LITERAL, value)
+                            var_node.children.append(expr_node)
                             self.current_index += 1  
                     else:
                         # For other types, parse a full expression
                         expr_node = self._parse_expression()
-                        var_node.add_child(expr_node)
+                        var_node.children.append(expr_node)
             
-            # Add the variable declaration to the AST
-            self.ast.add_child(var_node)
-            
-            self._skip_comments() 
+            # Declarations attach themselves, since one statement can declare several
+            self._parents[-1].children.append(var_node)
             
             # Check for comma or semicolon
-            if self.current_index >= len(self.tokens):
-                self.errors.append(f"Expected ';' at end of statement at line {var_name.line}, column {var_name.column}")
+            if self.current_index >= self._n:
+                self.errors.append(f"Expected ';' at end of statement at line {self.tokens[name_index].line}, column {self.tokens[name_index].column}")
                 return
                 
             # If we have a comma, continue parsing more variables of the same type
-            if self.tokens[self.current_index].value == ",":
+            if self.tok_value[self.current_index] == ",":
                 self.current_index += 1 
-                self._skip_comments() 
                 continue
                 
             # If we have a semicolon, we're done
-            if self.tokens[self.current_index].value == ";":
+            if self.tok_value[self.current_index] == ";":
                 self.current_index += 1  
                 return
                 
             # Otherwise, it's an error
-            self.errors.append(f"Expected ',' or ';' after variable declaration at line {var_name.line}, column {var_name.column}")
+            self.errors.append(f"Expected ',' or ';' after variable declaration at line {self.tokens[name_index].line}, column {self.tokens[name_index].column}")
             return
             
     def _parse_expression(self):
-        if self.current_index >= len(self.tokens):
+        if self.current_index >= self._n:
             self.errors.append("Unexpected end of input while parsing expression")
-            return ASTNode("Error")
-        
-        return self._parse_assignment()
-    
-    def _parse_assignment(self):
-        left = self._parse_logical_or()
+            return _ERROR
         
-        self._skip_comments() 
+        left = self._parse_binary(1)
+        if self.tok_value[self.current_index] != "=":
+            return left
         
-        if self.current_index < len(self.tokens) and self.tokens[self.current_index].value == "=":
-            op_token = self.tokens[self.current_index]
+        # Assignment binds loosest and is right-associative: collect the
+        # operands of a chain like a = b = c, then fold them from the right
+        operands = [left]
+        while self.tok_value[self.current_index] == "=":
             self.current_index += 1
             
-            self._skip_comments()  
-            
-            right = self._parse_assignment()
-            return ASTNode("Assignment", op_token.value, [left, right])
-        
-        return left
-    
-    def _parse_logical_or(self):
-        left = self._parse_logical_and()
-        
-        while self.current_index < len(self.tokens):
-            self._skip_comments()  
-            
-            if self.current_index < len(self.tokens) and self.tokens[self.current_index].value == "||":
-                op_token = self.tokens[self.current_index]
-                self.current_index += 1
-                
-                self._skip_comments()  
-                
-                right = self._parse_logical_and()
-                left = ASTNode("BinaryOp", op_token.value, [left, right])
-            else:
-                break
-        
-        return left
-        
-    def _parse_logical_and(self):
-        left = self._parse_equality()
-        
-        while self.current_index < len(self.tokens):
-            self._skip_comments()  
-            
-            if self.current_index < len(self.tokens) and self.tokens[self.current_index].value == "&&":
-                op_token = self.tokens[self.current_index]
-                self.current_index += 1
-                
-                self._skip_comments() 
-                
-                right = self._parse_equality()
-                left = ASTNode("BinaryOp", op_token.value, [left, right])
-            else:
-                break
+            operands.append(self._parse_binary(1))
         
-        return left
-    
-    def _parse_equality(self):
-        left = self._parse_relational()
+        node = operands.pop()
+        while operands:
+            node = ASTNode(_ASSIGNMENT, "=", [operands.pop(), node])
         
-        while self.current_index < len(self.tokens):
-            self._skip_comments()  
-            
-            if self.current_index < len(self.tokens) and self.tokens[self.current_index].value in ["==", "!="]:
-                op_token = self.tokens[self.current_index]
-                self.current_index += 1
-                
-                self._skip_comments()  
-                
-                right = self._parse_relational()
-                left = ASTNode("BinaryOp", op_token.value, [left, right])
-            else:
-                break
-        
-        return left
+        return node
     
-    def _parse_relational(self):
-        left = self._parse_additive()
-        
-        while self.current_index < len(self.tokens):
-            self._skip_comments()  
-            
-            if self.current_index < len(self.tokens) and self.tokens[self.current_index].value in ["<", ">", "<=", ">="]:
-                op_token = self.tokens[self.current_index]
-                self.current_index += 1
-                
-                self._skip_comments()  
-                
-                right = self._parse_additive()
-                left = ASTNode("BinaryOp", op_token.value, [left, right])
-            else:
-                break
-        
-        return left
-    
-    def _parse_additive(self):
-        left = self._parse_multiplicative()
-        
-        while self.current_index < len(self.tokens):
-            self._skip_comments()  
-            
-            if self.current_index < len(self.tokens) and self.tokens[self.current_index].value in ["+", "-"]:
-                op_token = self.tokens[self.current_index]
-                self.current_index += 1
-                
-                self._skip_comments()  
-                
-                right = self._parse_multiplicative()
-                left = ASTNode("BinaryOp", op_token.value, [left, right])
-            else:
-                break
-        
-        return left
-    
-    def _parse_multiplicative(self):
+    def _parse_binary(self, min_precedence):
+        # Precedence climbing: one loop handles every binary level, recursing
+        # only for the right operand of an operator that binds tighter
+        values = self.tok_value
         left = self._parse_unary()
         
-        while self.current_index < len(self.tokens):
-            self._skip_comments()  
-            
-            if self.current_index < len(self.tokens) and self.tokens[self.current_index].value in ["*", "/", "%"]:
-                op_token = self.tokens[self.current_index]
-                self.current_index += 1
-                
-                self._skip_comments()  
-                
-                right = self._parse_unary()
-                left = ASTNode("BinaryOp", op_token.value, [left, right])
-            else:
+        # The EOF sentinel has no precedence, so it ends the loop like any
+        # other non-operator
+        while True:
+            op = values[self.current_index]
+            precedence = _PRECEDENCE.get(op, 0)
+            if precedence < min_precedence:
                 break
+            self.current_index += 1
+            
+            # All binary operators are left-associative
+            right = self._parse_binary(precedence + 1)
+            left = ASTNode(_BINARY_OP, op, [left, right])
         
         return left
     
     def _parse_unary(self):
-        self._skip_comments()  
-        
-        if self.current_index < len(self.tokens) and self.tokens[self.current_index].value in ["+", "-", "!", "++", "--"]:
-            op_token = self.tokens[self.current_index]
-            self.current_index += 1
-            
-            self._skip_comments()  
-            
-            right = self._parse_unary()
-            return ASTNode("UnaryOp", op_token.value, [right])
-        
-        return self._parse_primary()
+        values = self.tok_value
+        i = self.current_index
+        if values[i] not in _UNARY_OPS:
+            return self._parse_primary()
+        
+        # Collect prefix operators, then wrap the operand innermost first
+        ops = []
+        while values[i] in _UNARY_OPS:
+            ops.append(values[i])
+            i += 1
+        self.current_index = i
+        
+        node = self._parse_primary()
+        while ops:
+            node = ASTNode(_UNARY_OP, ops.pop(), [node])
+        
+        return node
     
     def _parse_primary(self):
-        self._skip_comments()  
-        
-        if self.current_index >= len(self.tokens):
+        i = self.current_index
+        if i >= self._n:
             self.errors.append("Unexpected end of input while parsing primary expression")
-            return ASTNode("Error")
-        
-        token = self.tokens[self.current_index]
-        self.current_index += 1
-        
-        if token.type == TokenType.LITERAL:
-            return ASTNode("Literal", token.value)
-        elif token.type == TokenType.IDENTIFIER:
+            return _ERROR
+        
+        token_type = self.tok_type[i]
+        value = self.tok_value[i]
+        
+        if token_type == TokenType.LITERAL:
+            self.current_index = i + 1
+            node = self._literals.get(value)
+            if node is None:
+                node = self._literals[value] = ASTNode(NodeType.LITERAL, value)
+            return node
+        elif token_type == TokenType.IDENTIFIER:
             # Get the identifier node
-            id_node = ASTNode("Identifier", token.value)
-            
-            self._skip_comments()  
+            id_node = self._identifiers.get(value)
+            if id_node is None:
+                id_node = self._identifiers[value] = ASTNode(_IDENTIFIER, value)
             
             # Check for postfix operators
-            if (self.current_index < len(self.tokens) and 
-                self.tokens[self.current_index].value in ["++", "--"]):
-                op_token = self.tokens[self.current_index]
-                self.current_index += 1
-                return ASTNode("PostfixOp", op_token.value, [id_node])
+            op = self.tok_value[i + 1]
+            if op in _POSTFIX_OPS:
+                self.current_index = i + 2
+                return ASTNode(NodeType.POSTFIX_OP, op, [id_node])
             
+            self.current_index = i + 1
             return id_node
-        elif token.value == "(":
+        
+        self.current_index = i + 1
+        if value == "(":
             expr = self._parse_expression()
             
-            self._skip_comments()  
-            
-            if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != ")":
-                self.errors.append(f"Expected ')' after expression at line {token.line}, column {token.column}")
-                return ASTNode("Error")
+            if self.tok_value[self.current_index] != ")":
+                self.errors.append(f"Expected ')' after expression at line {self.tokens[i].line}, column {self.tokens[i].column}")
+                return _ERROR
             
             self.current_index += 1  
             return expr
         else:
-            self.errors.append(f"Unexpected token in expression: {token.value} at line {token.line}, column {token.column}")
-            return ASTNode("Error")
+            self.errors.append(f"Unexpected token in expression: {value} at line {self.tokens[i].line}, column {self.tokens[i].column}")
+            return _ERROR
             
     def _parse_expression_statement(self):
         expr = self._parse_expression()
         
-        self._skip_comments()  
-        
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != ";":
+        if self.tok_value[self.current_index] != ";":
             self.errors.append(f"Expected ';' after expression at line {self.tokens[self.current_index-1].line}, column {self.tokens[self.current_index-1].column}")
-            return
+            return None
         
         self.current_index += 1  
-        self.ast.add_child(expr)
+        return expr
     
     def _parse_block(self):
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != "{":
+        if self.tok_value[self.current_index] != "{":
             self.errors.append("Expected '{' to start block")
-            return
+            return None
         
         self.current_index += 1  
         
-        block_node = ASTNode("Block")
+        block_node = ASTNode(_BLOCK, None, [])
         
-        while self.current_index < len(self.tokens):
-            self._skip_comments()  
-            
-            if self.current_index < len(self.tokens) and self.tokens[self.current_index].value == "}":
-                break
-            
-            try:
-                self._parse_statement()
-            except Exception as e:
-                self.errors.append(str(e))
-                self._synchronize()
+        # Blocks opened directly inside this one are pushed onto the parents
+        # stack rather than parsed by recursing
+        parents = self._parents
+        depth = len(parents)
+        parents.append(block_node)
         
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != "}":
-            self.errors.append("Expected '}' to end block")
-            return
+        try:
+            while len(parents) > depth:
+                while self.current_index < self._n:
+                    value = self.tok_value[self.current_index]
+                    if value == "}":
+                        break
+                    
+                    if value == "{":
+                        self.current_index += 1
+                        nested = ASTNode(_BLOCK, None, [])
+                        parents[-1].children.append(nested)
+                        parents.append(nested)
+                        continue
+                    
+                    try:
+                        self._parse_statement()
+                    except Exception as e:
+                        self.errors.append(str(e))
+                        self._synchronize()
+                
+                # Only running out of tokens ends the loop without a '}', which
+                # leaves every open block unclosed
+                if self.tok_value[self.current_index] != "}":
+                    self.errors.extend(["Expected '}' to end block"] * (len(parents) - depth))
+                    return None
+                
+                self.current_index += 1  
+                parents.pop()
+        finally:
+            del parents[depth:]
         
-        self.current_index += 1  
-        self.ast.add_child(block_node)
+        return block_node
+    
+    def _parse_body(self):
+        # Loop and if bodies are always a single Block node; a lone statement
+        # gets wrapped in one
+        if self.tok_value[self.current_index] == "{":
+            return self._parse_block() or ASTNode(_BLOCK)
+        
+        body_node = ASTNode(_BLOCK, None, [])
+        self._parents.append(body_node)
+        try:
+            self._parse_statement()
+        finally:
+            self._parents.pop()
+        return body_node
     
     # Loop parsing functions   
     def _parse_for_loop(self):
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != "for":
+        if self.tok_value[self.current_index] != "for":
             self.errors.append("Expected 'for' keyword")
             return None
         self.current_index += 1  
         
-        self._skip_comments()  
-        
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != "(":
+        if self.tok_value[self.current_index] != "(":
             self.errors.append("Expected '(' after 'for'")
             return None
         self.current_index += 1 
         
-        self._skip_comments()  
-        
-        for_node = ASTNode("ForLoop")
+        for_node = ASTNode(NodeType.FOR_LOOP, None, [])
         
         # Parse initialization
-        if (self.current_index < len(self.tokens) and 
-            self.tokens[self.current_index].type == TokenType.KEYWORD and 
-            self.tokens[self.current_index].value in ["int", "float", "char", "double", "bool"]):
+        if self.tok_value[self.current_index] in _TYPE_KWS:
             # Get the type
-            var_type = self.tokens[self.current_index].value
+            var_type = self.tok_value[self.current_index]
             self.current_index += 1  
             
-            self._skip_comments()  
-            
             # Get the variable name
-            if self.current_index >= len(self.tokens) or self.tokens[self.current_index].type != TokenType.IDENTIFIER:
+            if self.tok_type[self.current_index] != TokenType.IDENTIFIER:
                 self.errors.append("Expected identifier after type")
                 return None
             
-            var_name = self.tokens[self.current_index].value
+            var_name = self.tok_value[self.current_index]
             self.current_index += 1 
             
-            self._skip_comments()  
-            
-            # Create a variable declaration node
-            var_decl = ASTNode("VariableDeclaration")
-            var_decl.value = var_type
-            
-            # Add the identifier as a child
-            id_node = ASTNode("Identifier")
-            id_node.value = var_name
-            var_decl.add_child(id_node)
+            # Create a variable declaration node with the identifier as a child
+            var_decl = ASTNode(_VARIABLE_DECLARATION, var_type, [ASTNode(_IDENTIFIER, var_name)])
             
             # Handle initialization if present
-            if self.current_index < len(self.tokens) and self.tokens[self.current_index].value == "=":
+            if self.tok_value[self.current_index] == "=":
                 self.current_index += 1  
                 
-                self._skip_comments()  
-                
                 # Parse the initializer expression
                 init_expr = self._parse_expression()
                 if init_expr is not None:
-                    var_decl.add_child(init_expr)
+                    var_decl.children.append(init_expr)
             
             # Add the variable declaration to the for loop node
-            for_node.add_child(var_decl)
-            
-            self._skip_comments() 
+            for_node.children.append(var_decl)
             
             # Expect semicolon
-            if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != ";":
+            if self.tok_value[self.current_index] != ";":
                 self.errors.append("Expected ';' after variable declaration")
                 return None
             self.current_index += 1  
@@ -476,275 +500,199 @@ class Parser:
             # Expression initialization
             init_expr = self._parse_expression()
             if init_expr is None:
-                init_expr = ASTNode("Empty")
-            for_node.add_child(init_expr)
+                init_expr = _EMPTY
+            for_node.children.append(init_expr)
             
-            self._skip_comments()  
-            
-            if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != ";":
+            if self.tok_value[self.current_index] != ";":
                 self.errors.append("Expected ';' after for loop initialization")
                 return None
             self.current_index += 1  
         
-        self._skip_comments() 
-        
         # Parse condition
-        if self.current_index < len(self.tokens) and self.tokens[self.current_index].value != ";":
+        if self.current_index < self._n and self.tok_value[self.current_index] != ";":
             condition = self._parse_expression()
             if condition is None:
-                condition = ASTNode("Empty")
-            for_node.add_child(condition)
+                condition = _EMPTY
+            for_node.children.append(condition)
         else:
-            for_node.add_child(ASTNode("Empty"))
-        
-        self._skip_comments() 
+            for_node.children.append(_EMPTY)
         
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != ";":
+        if self.tok_value[self.current_index] != ";":
             self.errors.append("Expected ';' after for loop condition")
             return None
         self.current_index += 1  
         
-        self._skip_comments() 
-        
         # Parse increment
-        if self.current_index < len(self.tokens) and self.tokens[self.current_index].value != ")":
+        if self.current_index < self._n and self.tok_value[self.current_index] != ")":
             increment = self._parse_expression()
             if increment is None:
-                increment = ASTNode("Empty")
-            for_node.add_child(increment)
+                increment = _EMPTY
+            for_node.children.append(increment)
         else:
-            for_node.add_child(ASTNode("Empty"))
-        
-        self._skip_comments()  
+            for_node.children.append(_EMPTY)
         
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != ")":
+        if self.tok_value[self.current_index] != ")":
             self.errors.append("Expected ')' after for loop increment")
             return None
         self.current_index += 1  
         
-        self._skip_comments()  
-        
         # Parse body
-        body_node = None
-        
-        # Check if we have a block
-        if self.current_index < len(self.tokens) and self.tokens[self.current_index].value == "{":
-            body_node = self._parse_block()
-            if body_node is None:
-                body_node = ASTNode("Block")
-        else:
-            # Parse the statement
-            if self.current_index < len(self.tokens):
-                body_node = self._parse_statement()
-                if body_node is None:
-                    body_node = ASTNode("Statement")
-            else:
-                body_node = ASTNode("Block")  # Empty block if nothing to parse
-        
-        for_node.add_child(body_node)
+        for_node.children.append(self._parse_body())
     
         return for_node
     
     def _parse_do_while_loop(self):
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != "do":
+        if self.tok_value[self.current_index] != "do":
             self.errors.append("Expected 'do' keyword")
             return
         
         self.current_index += 1  
-        self._skip_comments()  
-        
-        do_while_node = ASTNode("DoWhileLoop")
         
         # Parse body
-        if self.current_index < len(self.tokens) and self.tokens[self.current_index].value == "{":
-            self._parse_block()
-        else:
-            self._parse_statement()
+        body_node = self._parse_body()
         
-        self._skip_comments() 
-        
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != "while":
+        if self.tok_value[self.current_index] != "while":
             self.errors.append("Expected 'while' after do-while loop body")
             return
         
         self.current_index += 1 
-        self._skip_comments() 
         
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != "(":
+        if self.tok_value[self.current_index] != "(":
             self.errors.append("Expected '(' after 'while' in do-while loop")
             return
         
         self.current_index += 1  
-        self._skip_comments()  
-        
-        # Parse condition
-        condition = self._parse_expression()
-        do_while_node.add_child(condition)
         
-        self._skip_comments()  
+        # Parse condition; it comes first in the node, like the other loops
+        do_while_node = ASTNode(NodeType.DO_WHILE_LOOP, None, [self._parse_expression(), body_node])
         
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != ")":
+        if self.tok_value[self.current_index] != ")":
             self.errors.append("Expected ')' after do-while loop condition")
             return
         
         self.current_index += 1  
-        self._skip_comments()  
         
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != ";":
+        if self.tok_value[self.current_index] != ";":
             self.errors.append("Expected ';' after do-while loop")
             return
         
         self.current_index += 1  
-        self.ast.add_child(do_while_node)
+        return do_while_node
         
     def _parse_while_loop(self):
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != "while":
+        if self.tok_value[self.current_index] != "while":
             self.errors.append("Expected 'while' keyword")
             return
         
         self.current_index += 1  
-        self._skip_comments()  
         
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != "(":
+        if self.tok_value[self.current_index] != "(":
             self.errors.append("Expected '(' after 'while'")
             return
         
         self.current_index += 1  
-        self._skip_comments()  
-        
-        while_node = ASTNode("WhileLoop")
         
         # Parse condition
-        condition = self._parse_expression()
-        while_node.add_child(condition)
-        
-        self._skip_comments()  
+        while_node = ASTNode(NodeType.WHILE_LOOP, None, [self._parse_expression()])
         
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != ")":
+        if self.tok_value[self.current_index] != ")":
             self.errors.append("Expected ')' after while condition")
             return
         
         self.current_index += 1 
-        self._skip_comments()  
         
         # Parse body
-        if self.current_index < len(self.tokens) and self.tokens[self.current_index].value == "{":
-            self._parse_block()
-        else:
-            self._parse_statement()
+        while_node.children.append(self._parse_body())
         
-        self.ast.add_child(while_node)
+        return while_node
     
     def _parse_if_statement(self):
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != "if":
+        if self.tok_value[self.current_index] != "if":
             self.errors.append("Expected 'if' keyword")
             return
         
         self.current_index += 1  
-        self._skip_comments()  
         
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != "(":
+        if self.tok_value[self.current_index] != "(":
             self.errors.append("Expected '(' after 'if'")
             return
         
         self.current_index += 1  
-        self._skip_comments()  
-        
-        if_node = ASTNode("IfStatement")
         
         # Parse condition
-        condition = self._parse_expression()
-        if_node.add_child(condition)
-        
-        self._skip_comments()  
+        if_node = ASTNode(NodeType.IF_STATEMENT, None, [self._parse_expression()])
         
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != ")":
+        if self.tok_value[self.current_index] != ")":
             self.errors.append("Expected ')' after if condition")
             return
         
         self.current_index += 1  
-        self._skip_comments()  
         
         # Parse then branch
-        if self.current_index < len(self.tokens) and self.tokens[self.current_index].value == "{":
-            self._parse_block()
-        else:
-            self._parse_statement()
-        
-        self._skip_comments()  
+        if_node.children.append(self._parse_body())
         
         # Parse else branch if present
-        if self.current_index < len(self.tokens) and self.tokens[self.current_index].value == "else":
+        if self.tok_value[self.current_index] == "else":
             self.current_index += 1 
-            self._skip_comments()  
             
-            if self.current_index < len(self.tokens) and self.tokens[self.current_index].value == "{":
-                self._parse_block()
-            else:
-                self._parse_statement()
+            if_node.children.append(self._parse_body())
         
-        self.ast.add_child(if_node)
+        return if_node
         
     def _parse_switch_statement(self):
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != "switch":
+        if self.tok_value[self.current_index] != "switch":
             self.errors.append("Expected 'switch' keyword")
             return None
         
         self.current_index += 1  
-        self._skip_comments()  
         
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != "(":
+        if self.tok_value[self.current_index] != "(":
             self.errors.append("Expected '(' after 'switch'")
             return None
         
         self.current_index += 1 
-        self._skip_comments()  
         
-        switch_node = ASTNode("SwitchStatement")
+        switch_node = ASTNode(NodeType.SWITCH_STATEMENT, None, [])
         
         # Parse the expression to switch on
         expression = self._parse_expression()
         if expression:
-            switch_node.add_child(expression)
-        
-        self._skip_comments()  
+            switch_node.children.append(expression)
         
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != ")":
+        if self.tok_value[self.current_index] != ")":
             self.errors.append("Expected ')' after switch expression")
             return switch_node
         
         self.current_index += 1  
-        self._skip_comments()  
         
         # Parse the switch body with cases
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != "{":
+        if self.tok_value[self.current_index] != "{":
             self.errors.append("Expected '{' after switch condition")
             return switch_node
         
         self.current_index += 1 
-        self._skip_comments()  
         
         # Parse case statements
-        while self.current_index < len(self.tokens) and self.tokens[self.current_index].value != "}":
-            self._skip_comments()  
-            
-            if self.current_index >= len(self.tokens):
-                self.errors.append("Unexpected end of file in switch statement")
-                return switch_node
+        values = self.tok_value
+        n = self._n
+        while self.current_index < n:
+            value = values[self.current_index]
+            if value == "}":
+                break
             
-            if self.tokens[self.current_index].value == "case":
+            if value == "case":
                 case_node = self._parse_case_statement()
                 if case_node:
-                    switch_node.add_child(case_node)
-            elif self.tokens[self.current_index].value == "default":
+                    switch_node.children.append(case_node)
+            elif value == "default":
                 default_node = self._parse_default_statement()
                 if default_node:
-                    switch_node.add_child(default_node)
+                    switch_node.children.append(default_node)
             else:
-                self.errors.append(f"Expected 'case' or 'default' in switch statement, got {self.tokens[self.current_index].value}")
+                self.errors.append(f"Expected 'case' or 'default' in switch statement, got {value}")
                 self._synchronize()
         
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != "}":
+        if values[self.current_index] != "}":
             self.errors.append("Expected '}' to close switch statement")
             return switch_node
         
@@ -752,81 +700,74 @@ class Parser:
         return switch_node
         
     def _parse_case_statement(self):
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != "case":
+        if self.tok_value[self.current_index] != "case":
             self.errors.append("Expected 'case' keyword")
             return None
         
         self.current_index += 1  
-        self._skip_comments()  
         
-        case_node = ASTNode("CaseStatement")
+        case_node = ASTNode(NodeType.CASE_STATEMENT, None, [])
         
         # Parse the case value
         value = self._parse_expression()
         if value:
-            case_node.add_child(value)
+            case_node.children.append(value)
         
-        self._skip_comments()  
-        
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != ":":
+        if self.tok_value[self.current_index] != ":":
             self.errors.append("Expected ':' after case value")
             return case_node
         
         self.current_index += 1  
-        self._skip_comments()  
         
         # Parse case body statements
-        while (self.current_index < len(self.tokens) and 
-               self.tokens[self.current_index].value not in ["case", "default", "}"]):
-            
-            statement = self._parse_statement()
-            if statement:
-                case_node.add_child(statement)
-            
-            self._skip_comments()  
+        self._parents.append(case_node)
+        values = self.tok_value
+        n = self._n
+        try:
+            while self.current_index < n and values[self.current_index] not in _CASE_END:
+                self._parse_statement()
+        finally:
+            self._parents.pop()
         
         return case_node
     
     def _parse_default_statement(self):
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != "default":
+        if self.tok_value[self.current_index] != "default":
             self.errors.append("Expected 'default' keyword")
             return None
         
         self.current_index += 1  
-        self._skip_comments()  
         
-        default_node = ASTNode("DefaultStatement")
+        default_node = ASTNode(NodeType.DEFAULT_STATEMENT, None, [])
         
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != ":":
+        if self.tok_value[self.current_index] != ":":
             self.errors.append("Expected ':' after default")
             return default_node
         
         self.current_index += 1  
-        self._skip_comments()  
         
         # Parse default body statements
-        while (self.current_index < len(self.tokens) and 
-               self.tokens[self.current_index].value not in ["case", "default", "}"]):
-            
-            statement = self._parse_statement()
-            if statement:
-                default_node.add_child(statement)
-            
-            self._skip_comments()  
+        self._parents.append(default_node)
+        values = self.tok_value
+        n = self._n
+        try:
+            while self.current_index < n and values[self.current_index] not in _CASE_END:
+                self._parse_statement()
+        finally:
+            self._parents.pop()
         
         return default_node
     
     def _parse_break_statement(self):
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != "break":
+        if self.tok_value[self.current_index] != "break":
             self.errors.append("Expected 'break' keyword")
             return None
         
         self.current_index += 1  
-        self._skip_comments()  
         
-        break_node = ASTNode("BreakStatement")
+        break_node = ASTNode(NodeType.BREAK_STATEMENT)
         
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != ";":
+        if self.tok_value[self.current_index] != ";":
             self.errors.append("Expected ';' after break statement")
             return break_node
         
@@ -834,24 +775,21 @@ class Parser:
         return break_node
     
     def _parse_return_statement(self):
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != "return":
+        if self.tok_value[self.current_index] != "return":
             self.errors.append("Expected 'return' keyword")
             return None
         
         self.current_index += 1  
-        self._skip_comments()  
         
-        return_node = ASTNode("ReturnStatement")
+        return_node = ASTNode(NodeType.RETURN_STATEMENT, None, [])
         
         # Parse return value if not immediately followed by semicolon
-        if self.current_index < len(self.tokens) and self.tokens[self.current_index].value != ";":
+        if self.current_index < self._n and self.tok_value[self.current_index] != ";":
             expr = self._parse_expression()
             if expr:
-                return_node.add_child(expr)
-        
-        self._skip_comments()  # Skip comments after return expression
+                return_node.children.append(expr)
         
-        if self.current_index >= len(self.tokens) or self.tokens[self.current_index].value != ";":
+        if self.tok_value[self.current_index] != ";":
             self.errors.append("Expected ';' after return statement")
             return return_node
         
@@ -1,61 +1,90 @@
+import functools
+import re
+
 from PyQt5.QtCore import QRegExp
 from PyQt5.QtGui import QSyntaxHighlighter, QTextCharFormat, QFont, QColor
 
+# Keywords Scope
+_KEYWORDS = [
+    "bool", "break", "case", "char", "class", "continue", "default",
+    "do", "double", "else", "false", "float", "for", "if", "int", "long",
+    "return", "short", "string", "switch", "true", "while"
+]
+
+# Every character of a multi-character operator is an operator on its own,
+# so a run of them is highlighted as a whole
+_OPERATOR_CHARS = "=!<>+\\-*/%&|^~"
+
+# One pattern for every category, scanned once per block. Strings come first
+# so that whatever they contain is part of the string.
+_PATTERN = re.compile("|".join([
+    r'(?P<string>"[^"\\\n]*(?:\\.[^"\\\n]*)*")',
+    r"(?P<number>\b[0-9]+\b)",
+    r"(?P<keyword>\b(?:" + "|".join(_KEYWORDS) + r")\b)",
+    "(?P<operator>[" + _OPERATOR_CHARS + "]+)",
+]))
+
+# Qt positions count UTF-16 code units, so characters outside the BMP are
+# stood in for by two placeholders to keep Python's indices lined up
+_ASTRAL = re.compile("[\U00010000-\U0010ffff]")
+
+# Code repeats the same lines ("}", "break;", ...), so remember their runs
+@functools.lru_cache(maxsize=1024)
+def _highlight_runs(text):
+    # Returns (start, length, group) for each highlighted run of a block
+    if not text.isascii():
+        text = _ASTRAL.sub("\ufffd\ufffd", text)
+    
+    # Everything from the first "//" on is a comment, even inside a string
+    comment_start = text.find("//")
+    if comment_start < 0:
+        comment_start = len(text)
+    
+    runs = []
+    for match in _PATTERN.finditer(text):
+        start = match.start()
+        if start >= comment_start:
+            break
+        runs.append((start, min(match.end(), comment_start) - start, match.lastgroup))
+    
+    if comment_start < len(text):
+        runs.append((comment_start, len(text) - comment_start, "comment"))
+    return tuple(runs)
+
 class SyntaxHighlighter(QSyntaxHighlighter):
     def __init__(self, parent=None):
         super().__init__(parent)
         
-        self.highlighting_rules = []
-        
         # Format for keywords
         keyword_format = QTextCharFormat()
         keyword_format.setForeground(QColor(0, 0, 255)) 
         keyword_format.setFontWeight(QFont.Bold)
         
-        # Keywords Scope
-        keywords = [
-            "bool", "break", "case", "char", "class", "continue", "default",
-            "do", "double", "else", "false", "float", "for", "if", "int", "long",
-            "return", "short", "string", "switch", "true", "while"
-        ]
-        
-        for word in keywords:
-            pattern = QRegExp("\\b" + word + "\\b")
-            self.highlighting_rules.append((pattern, keyword_format))
-        
         # Format for operators
         operator_format = QTextCharFormat()
         operator_format.setForeground(QColor(150, 0, 150))  # Purple
         operator_format.setFontWeight(QFont.Bold)
         
-        operators = [
-            "=", "==", "!=", "<", "<=", ">", ">=", "\\+", "-", "\\*", "/", "%",
-            "\\+=", "-=", "\\*=", "/=", "%=", "\\+\\+", "--", "&&", "\\|\\|", "!",
-            "&", "\\|", "\\^", "~", "<<", ">>", ">>=", "<<=", "&=", "\\|=", "\\^="
-        ]
-        
-        for op in operators:
-            pattern = QRegExp(op)
-            self.highlighting_rules.append((pattern, operator_format))
-        
         # Format for numbers
         number_format = QTextCharFormat()
         number_format.setForeground(QColor(0, 150, 0))  # Green
-        pattern = QRegExp("\\b[0-9]+\\b")
-        self.highlighting_rules.append((pattern, number_format))
         
         # Format for strings
         string_format = QTextCharFormat()
         string_format.setForeground(QColor(255, 0, 0))  # Red
-        pattern = QRegExp("\".*\"")
-        pattern.setMinimal(True)
-        self.highlighting_rules.append((pattern, string_format))
         
         # Format for single-line comments
         comment_format = QTextCharFormat()
         comment_format.setForeground(QColor(128, 128, 128))  # Gray
-        pattern = QRegExp("//[^\n]*")
-        self.highlighting_rules.append((pattern, comment_format))
+        
+        # Pattern group -> format
+        self.group_formats = {
+            "keyword": keyword_format,
+            "operator": operator_format,
+            "number": number_format,
+            "string": string_format,
+            "comment": comment_format,
+        }
         
         # Format for multi-line comments
         self.multi_line_comment_format = QTextCharFormat()
@@ -65,11 +94,29 @@ class SyntaxHighlighter(QSyntaxHighlighter):
         self.comment_end_expression = QRegExp("\\*/")
         
     def highlightBlock(self, text):
-        # Apply regular highlighting rules
-        for pattern, format in self.highlighting_rules:
-            expression = QRegExp(pattern)
-            index = expression.indexIn(text)
-            while index >= 0:
-                length = expression.matchedLength()
-                self.setFormat(index, length, format)
-                index = expression.indexIn(text, index + length)
\ No newline at end of file
+        group_formats = self.group_formats
+        set_format = self.setFormat
+        for start, length, group in _highlight_runs(text):
+            set_format(start, length, group_formats[group])
+
+class ViewportSyntaxHighlighter(SyntaxHighlighter):
+    # Only highlights blocks inside the range the editor reports as visible;
+    # the editor rehighlights the rest as they scroll into view
+    def __init__(self, parent=None):
+        self.first_visible = 0
+        self.last_visible = -1
+        self.highlighted_blocks = set()
+        super().__init__(parent)
+
+    def setVisibleRange(self, first, last):
+        self.first_visible = first
+        self.last_visible = last
+
+    def highlightBlock(self, text):
+        number = self.currentBlock().blockNumber()
+        if number < self.first_visible or number > self.last_visible:
+            # Left plain for now, so it has to be redone once visible
+            self.highlighted_blocks.discard(number)
+            return
+        super().highlightBlock(text)
+        self.highlighted_blocks.add(number)
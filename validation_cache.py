@@ -0,0 +1,47 @@
+import hashlib
+import os
+import pickle
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "quadpalidator")
+MAX_ENTRIES = 100
+
+# Bump whenever the lexer, parser or analyzer change what they report
+CACHE_VERSION = 3
+
+def source_hash(code):
+    return hashlib.sha256(f"{CACHE_VERSION}\0{code}".encode("utf-8")).hexdigest()
+
+def _entry_path(code_hash):
+    return os.path.join(CACHE_DIR, code_hash + ".pkl")
+
+def cache_lookup(code_hash):
+    path = _entry_path(code_hash)
+    try:
+        with open(path, "rb") as f:
+            entry = pickle.load(f)
+        # Touch it so eviction drops the least recently used entries
+        os.utime(path)
+        return entry
+    except Exception:
+        # Missing, unreadable or stale entries are just misses
+        return None
+
+def cache_store(code_hash, entry):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = _entry_path(code_hash) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, _entry_path(code_hash))
+        _evict()
+    except Exception:
+        pass
+
+def _evict():
+    entries = [entry for entry in os.scandir(CACHE_DIR) if entry.name.endswith(".pkl")]
+    if len(entries) <= MAX_ENTRIES:
+        return
+
+    entries.sort(key=lambda entry: entry.stat().st_mtime)
+    for entry in entries[:len(entries) - MAX_ENTRIES]:
+        os.remove(entry.path)